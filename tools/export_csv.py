@@ -0,0 +1,47 @@
+import io, csv
+
+from ingest_issue import load_json, write_if_changed
+
+DATA_CSV = "data/words.csv"
+
+CSV_FIELDNAMES = (
+    "word","part_of_speech",
+    "other_spelling",
+    "pronunciation","meaning_ja",
+    "examples","synonyms","tags","notes",
+    "mastery","last_reviewed","created_at","source_issue"
+)
+
+def dump_csv(items) -> bytes:
+    buf = io.StringIO(newline="")
+    w = csv.writer(buf)
+    w.writerow(CSV_FIELDNAMES)
+    # Bind hot callables to locals to skip attribute lookups per row
+    writerow = w.writerow
+    join = " | ".join
+    for it in items:
+        get = it.get
+        writerow((
+            get("word",""),
+            get("part_of_speech",""),
+            get("other_spelling",""),
+            get("pronunciation",""),
+            get("meaning_ja",""),
+            join(get("examples",())),
+            join(get("synonyms",())),
+            join(get("tags",())),
+            get("notes",""),
+            get("mastery",0),
+            get("last_reviewed",""),
+            get("created_at",""),
+            get("source_issue",""),
+        ))
+    return buf.getvalue().encode("utf-8")
+
+def main():
+    # words.csv is a projection of words.json; regenerate it on demand rather than per issue
+    changed = write_if_changed(DATA_CSV, dump_csv(load_json()))
+    print("updated" if changed else "unchanged")
+
+if __name__ == "__main__":
+    main()
@@ -1,87 +1,128 @@
-import json, os, re, csv
+import argparse, bisect, json, mmap, os, re, sys
 from datetime import datetime, timezone
+from operator import itemgetter
+
+try:
+    import orjson
+except ImportError:  # fall back to the stdlib encoder/decoder
+    orjson = None
 
 ISSUE_BODY = os.environ.get("ISSUE_BODY", "")
 ISSUE_NUMBER = os.environ.get("ISSUE_NUMBER", "")
 ISSUE_URL = os.environ.get("ISSUE_URL", "")
 
 DATA_JSON = "data/words.json"
-DATA_CSV = "data/words.csv"
 
 NO_CHANGE_SENTINELS = {"(no change)", "(no-change)", "no change", "no-change"}
 
-def parse_field(label: str) -> str:
-    pattern = rf"^### {re.escape(label)}\s*\n(.+?)(?=\n### |\Z)"
-    m = re.search(pattern, ISSUE_BODY, flags=re.MULTILINE | re.DOTALL)
-    if not m:
-        return ""
-    val = m.group(1).strip()
+LINE_RE = re.compile(r"[^\r\n]+")
+
+FIELD_LABELS = {
+    "word": ["Word", "Word (must match existing)"],
+    "part_of_speech": ["Part of speech", "Part of Speech"],
+    "other_spelling": [
+        "Other spelling (UK/US if different)",
+        "Other spelling (if different)",
+        "Other spelling",
+    ],
+    "pronunciation": ["Pronunciation (IPA etc.)", "Pronunciation"],
+    "meaning_ja": ["Meaning (Japanese)", "Meaning (JP)", "Meaning"],
+    "examples": ["Examples (one per line)", "Examples"],
+    "synonyms": ["Synonyms (comma-separated)", "Synonyms"],
+    "tags": ["Tags (comma-separated)", "Tags"],
+    "notes": ["Notes"],
+}
+
+ALL_LABELS = [lb for labels in FIELD_LABELS.values() for lb in labels]
+
+# One alternation over every known label, so the body is scanned once for all fields;
+# headers not listed here still end the previous section via the lookahead
+SECTION_RE = re.compile(
+    r"^### (?P<label>"
+    + "|".join(re.escape(lb) for lb in sorted(ALL_LABELS, key=len, reverse=True))
+    + r")\s*\n(?P<val>.*?)(?=\n### |\Z)",
+    re.MULTILINE | re.DOTALL,
+)
+
+def parse_sections(body: str) -> dict:
+    # Index every known "### Label" section by label
+    sections = {}
+    for m in SECTION_RE.finditer(body):
+        sections.setdefault(m["label"], m["val"].strip())
+    return sections
+
+def parse_field(sections: dict, label: str) -> str:
+    val = sections.get(label, "")
     if val == "_No response_":
         return ""
     return val
 
-def parse_any(labels):
+def parse_any(sections: dict, labels):
+    # Section values are stripped at parse time, so callers get them ready to use
     for lb in labels:
-        v = parse_field(lb)
-        if v.strip():
+        v = parse_field(sections, lb)
+        if v:
             return v
     return ""
 
 def split_csv_like(s: str):
-    parts = [p.strip() for p in s.split(",") if p.strip()]
-    seen = set()
-    out = []
-    for p in parts:
-        key = p.lower()
-        if key not in seen:
-            seen.add(key)
-            out.append(p)
-    return out
+    # Dicts keep insertion order, so setdefault dedups case-insensitively keeping the first spelling
+    out = {}
+    for p in s.split(","):
+        p = p.strip()
+        if p:
+            out.setdefault(p.lower(), p)
+    return list(out.values())
+
+def prepare_items(items):
+    for it in items:
+        # Short categorical values repeat across entries; share one string object per value
+        for k in ("part_of_speech", "source_issue"):
+            v = it.get(k)
+            if isinstance(v, str):
+                it[k] = sys.intern(v)
+        tags = it.get("tags")
+        if tags:
+            it["tags"] = [sys.intern(t) for t in tags]
+        # Entries written before _key existed get it backfilled once
+        if "_key" not in it:
+            it["_key"] = it.get("word","").strip().lower()
+    return items
 
 def load_json():
     if not os.path.exists(DATA_JSON):
         return []
+    if orjson is not None and os.path.getsize(DATA_JSON) > 0:
+        # orjson reads straight from the mapped pages, skipping the bytes copy of read()
+        with open(DATA_JSON, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            with memoryview(mm) as view:
+                return prepare_items(orjson.loads(view))
     with open(DATA_JSON, "r", encoding="utf-8") as f:
-        return json.load(f)
+        return prepare_items(json.load(f))
+
+def atomic_write_bytes(path: str, data: bytes):
+    # Write to a sibling temp file and swap it in, so a crash never leaves a truncated file
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+def write_if_changed(path: str, data: bytes) -> bool:
+    # Redundant issue edits produce identical output; leave the file untouched then
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return False
+    atomic_write_bytes(path, data)
+    return True
+
+def dump_json(items) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(items, option=orjson.OPT_INDENT_2)
+    return json.dumps(items, ensure_ascii=False, indent=2).encode("utf-8")
 
 def save_json(items):
-    with open(DATA_JSON, "w", encoding="utf-8") as f:
-        json.dump(items, f, ensure_ascii=False, indent=2)
-
-def save_csv(items):
-    fieldnames = [
-        "word","part_of_speech",
-        "other_spelling",
-        "pronunciation","meaning_ja",
-        "examples","synonyms","tags","notes",
-        "mastery","last_reviewed","created_at","source_issue"
-    ]
-    with open(DATA_CSV, "w", encoding="utf-8", newline="") as f:
-        w = csv.DictWriter(f, fieldnames=fieldnames)
-        w.writeheader()
-        for it in items:
-            w.writerow({
-                "word": it.get("word",""),
-                "part_of_speech": it.get("part_of_speech",""),
-                "other_spelling": it.get("other_spelling",""),
-                "pronunciation": it.get("pronunciation",""),
-                "meaning_ja": it.get("meaning_ja",""),
-                "examples": " | ".join(it.get("examples",[])),
-                "synonyms": " | ".join(it.get("synonyms",[])),
-                "tags": " | ".join(it.get("tags",[])),
-                "notes": it.get("notes",""),
-                "mastery": it.get("mastery",0),
-                "last_reviewed": it.get("last_reviewed",""),
-                "created_at": it.get("created_at",""),
-                "source_issue": it.get("source_issue",""),
-            })
-
-def find_index(items, word: str):
-    key = (word or "").strip().lower()
-    for i, it in enumerate(items):
-        if it.get("word","").strip().lower() == key:
-            return i
-    return -1
+    return write_if_changed(DATA_JSON, dump_json(items))
 
 def normalize_no_change(v: str) -> str:
     if not v:
@@ -90,87 +131,135 @@ def normalize_no_change(v: str) -> str:
         return ""
     return v.strip()
 
-def main():
-    word = parse_any(["Word", "Word (must match existing)"]).strip()
+STRING_FIELDS = ("part_of_speech", "other_spelling", "pronunciation", "meaning_ja", "notes")
+LIST_FIELDS = ("examples", "synonyms", "tags")
+
+def parse_one_body(body: str) -> dict:
+    # Returns the submitted fields; "" / None mean the field was left blank
+    sections = parse_sections(body)
+    word = parse_any(sections, FIELD_LABELS["word"])
     if not word:
-        raise SystemExit("Word is required but missing.")
+        raise ValueError("Word is required but missing.")
 
-    incoming_pos = normalize_no_change(parse_any(["Part of speech", "Part of Speech"]).strip())
-    incoming_other = parse_any([
-        "Other spelling (UK/US if different)",
-        "Other spelling (if different)",
-        "Other spelling",
-    ]).strip()
-    incoming_pron = parse_any(["Pronunciation (IPA etc.)", "Pronunciation"]).strip()
-    incoming_meaning = parse_any(["Meaning (Japanese)", "Meaning (JP)", "Meaning"]).strip()
-    incoming_examples_raw = parse_any(["Examples (one per line)", "Examples"])
-    incoming_syn_raw = parse_any(["Synonyms (comma-separated)", "Synonyms"])
-    incoming_tags_raw = parse_any(["Tags (comma-separated)", "Tags"])
-    incoming_notes = parse_any(["Notes"]).strip()
-
-    incoming_examples = [l.strip() for l in incoming_examples_raw.splitlines() if l.strip()] if incoming_examples_raw.strip() else []
-    incoming_synonyms = split_csv_like(incoming_syn_raw) if incoming_syn_raw.strip() else []
-    incoming_tags = split_csv_like(incoming_tags_raw) if incoming_tags_raw.strip() else []
+    examples_raw = parse_any(sections, FIELD_LABELS["examples"])
+    syn_raw = parse_any(sections, FIELD_LABELS["synonyms"])
+    tags_raw = parse_any(sections, FIELD_LABELS["tags"])
+    return {
+        "word": word,
+        "part_of_speech": normalize_no_change(parse_any(sections, FIELD_LABELS["part_of_speech"])),
+        "other_spelling": parse_any(sections, FIELD_LABELS["other_spelling"]),
+        "pronunciation": parse_any(sections, FIELD_LABELS["pronunciation"]),
+        "meaning_ja": parse_any(sections, FIELD_LABELS["meaning_ja"]),
+        "examples": [s for s in (m.group(0).strip() for m in LINE_RE.finditer(examples_raw)) if s] if examples_raw else None,
+        "synonyms": split_csv_like(syn_raw) if syn_raw else None,
+        "tags": split_csv_like(tags_raw) if tags_raw else None,
+        "notes": parse_any(sections, FIELD_LABELS["notes"]),
+    }
 
+def load_sorted():
     items = load_json()
-    idx = find_index(items, word)
+    keys = [it["_key"] for it in items]
+    if any(a > b for a, b in zip(keys, keys[1:])):
+        # The file on disk should already be sorted; repair it once if it isn't
+        items.sort(key=itemgetter("_key"))
+        keys = [it["_key"] for it in items]
+    return items, keys
 
-    now_iso = datetime.now(timezone.utc).isoformat()
-    source = ISSUE_URL or f"#{ISSUE_NUMBER}"
+def upsert(items, keys, by_key: dict, incoming: dict, source: str, now_iso: str) -> str:
+    word = incoming["word"]
+    key = word.lower()
+    it = by_key.get(key)
 
-    if idx == -1:
+    if it is None:
         # New entry needs meaning at least
-        if not incoming_meaning:
-            raise SystemExit("Meaning (Japanese) is required for a new word.")
+        if not incoming["meaning_ja"]:
+            raise ValueError("Meaning (Japanese) is required for a new word.")
         entry = {
             "word": word,
-            "part_of_speech": incoming_pos,
-            "other_spelling": incoming_other,
-            "pronunciation": incoming_pron,
-            "meaning_ja": incoming_meaning,
-            "examples": incoming_examples,
-            "synonyms": incoming_synonyms,
-            "tags": incoming_tags,
-            "notes": incoming_notes,
+            "part_of_speech": incoming["part_of_speech"],
+            "other_spelling": incoming["other_spelling"],
+            "pronunciation": incoming["pronunciation"],
+            "meaning_ja": incoming["meaning_ja"],
+            "examples": incoming["examples"] or [],
+            "synonyms": incoming["synonyms"] or [],
+            "tags": incoming["tags"] or [],
+            "notes": incoming["notes"],
             "mastery": 0,
             "last_reviewed": "",
             "created_at": now_iso,
             "source_issue": source,
+            "_key": key,
         }
-        items.append(entry)
-        status = "added"
-    else:
-        it = items[idx]
-        it["word"] = word
-
-        if incoming_pos:
-            it["part_of_speech"] = incoming_pos
-        if incoming_other:
-            it["other_spelling"] = incoming_other
-        if incoming_pron:
-            it["pronunciation"] = incoming_pron
-        if incoming_meaning:
-            it["meaning_ja"] = incoming_meaning
-
-        if incoming_examples_raw.strip():
-            it["examples"] = incoming_examples
-        if incoming_syn_raw.strip():
-            it["synonyms"] = incoming_synonyms
-        if incoming_tags_raw.strip():
-            it["tags"] = incoming_tags
-
-        if incoming_notes:
-            it["notes"] = incoming_notes
-
-        it["created_at"] = it.get("created_at") or now_iso
-        it["source_issue"] = source
-
-        items[idx] = it
-        status = "updated"
-
-    items.sort(key=lambda x: x.get("word","").lower())
+        # Insert at the sorted position instead of re-sorting the whole list
+        pos = bisect.bisect_left(keys, key)
+        items.insert(pos, entry)
+        keys.insert(pos, key)
+        by_key[key] = entry
+        return "added"
+
+    # Entries are updated in place; their key, and so their position, is unchanged
+    it["word"] = word
+    it["_key"] = key
+    for k in STRING_FIELDS:
+        if incoming[k]:
+            it[k] = incoming[k]
+    for k in LIST_FIELDS:
+        if incoming[k] is not None:
+            it[k] = incoming[k]
+
+    it["created_at"] = it.get("created_at") or now_iso
+    it["source_issue"] = source
+    return "updated"
+
+def issue_source(number, url) -> str:
+    return url or f"#{number}"
+
+def ingest_batch(issues):
+    # Apply every queued issue to one in-memory list, then write words.json once
+    items, keys = load_sorted()
+    by_key = dict(zip(keys, items))
+    now_iso = datetime.now(timezone.utc).isoformat()
+
+    failed = 0
+    for issue in issues:
+        source = issue_source(issue.get("number", ""), issue.get("url", ""))
+        try:
+            status = upsert(items, keys, by_key, parse_one_body(issue.get("body", "")), source, now_iso)
+        except ValueError as e:
+            print(f"{source}: error: {e}", file=sys.stderr)
+            failed += 1
+            continue
+        print(f"{source}: {status}")
+
+    save_json(items)
+    return failed
+
+def read_jsonl(path: str):
+    # One issue per line: {"body": ..., "number": ..., "url": ...}
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest vocab issue bodies into data/words.json")
+    parser.add_argument("--batch", metavar="ISSUES_JSONL",
+                        help="ingest every issue in a JSONL file with a single write")
+    args = parser.parse_args()
+
+    if args.batch:
+        if ingest_batch(read_jsonl(args.batch)):
+            raise SystemExit(1)
+        return
+
+    try:
+        incoming = parse_one_body(ISSUE_BODY)
+        items, keys = load_sorted()
+        now_iso = datetime.now(timezone.utc).isoformat()
+        status = upsert(items, keys, dict(zip(keys, items)), incoming,
+                        issue_source(ISSUE_NUMBER, ISSUE_URL), now_iso)
+    except ValueError as e:
+        raise SystemExit(str(e))
+
     save_json(items)
-    save_csv(items)
     print(status)
 
 if __name__ == "__main__":